@@ -0,0 +1,81 @@
+# app/assets.py
+import hashlib
+import json
+import logging
+import os
+from functools import lru_cache
+
+from fastapi.staticfiles import StaticFiles
+from jinja2 import FileSystemBytecodeCache
+
+with open("app/config.json") as f:
+    config = json.load(f)
+
+logger = logging.getLogger(__name__)
+
+STATIC_DIR = "app/static"
+TEMPLATE_DIR = "app/templates"
+STATIC_MAX_AGE = config.get("STATIC_MAX_AGE", 31536000)
+GZIP_MINIMUM_SIZE = config.get("GZIP_MINIMUM_SIZE", 500)
+TEMPLATE_AUTO_RELOAD = config.get("TEMPLATE_AUTO_RELOAD", False)
+TEMPLATE_CACHE_DIR = config.get("TEMPLATE_CACHE_DIR", ".jinja_cache")
+
+
+@lru_cache(maxsize=None)
+def content_hash(path, mtime_ns):
+    with open(os.path.join(STATIC_DIR, path), "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()[:12]
+
+
+def static_url(path):
+    """URL for a static asset, versioned by its content so it can be cached forever."""
+    mtime_ns = os.stat(os.path.join(STATIC_DIR, path)).st_mtime_ns
+    return f"/static/{path}?v={content_hash(path, mtime_ns)}"
+
+
+def ui_version(template_name):
+    """Version of a page's markup: its template mtime plus the hashed URLs of all static assets.
+
+    Mixed into ETags so a deploy that changes the page invalidates cached copies
+    even when the underlying data has not changed.
+    """
+    assets = []
+    for root, _, files in os.walk(STATIC_DIR):
+        for name in files:
+            assets.append(static_url(os.path.relpath(os.path.join(root, name), STATIC_DIR).replace(os.sep, "/")))
+    return os.stat(os.path.join(TEMPLATE_DIR, template_name)).st_mtime_ns, sorted(assets)
+
+
+class CachedStaticFiles(StaticFiles):
+    """StaticFiles that marks versioned (?v=<hash>) responses as immutable."""
+
+    async def get_response(self, path, scope):
+        response = await super().get_response(path, scope)
+        if response.status_code == 200 and b"v=" in scope.get("query_string", b""):
+            response.headers["Cache-Control"] = f"public, max-age={STATIC_MAX_AGE}, immutable"
+        return response
+
+
+def make_etag(*parts):
+    # Weak: the GZip middleware may re-encode the body
+    return f'W/"{hashlib.sha1(repr(parts).encode()).hexdigest()}"'
+
+
+def etag_matches(request, etag):
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    return if_none_match.strip() == "*" or etag in [t.strip() for t in if_none_match.split(",")]
+
+
+def configure_templates(templates):
+    """Cache compiled templates on disk, skip mtime checks in production and precompile all templates."""
+    env = templates.env
+    env.globals["static_url"] = static_url
+    env.auto_reload = TEMPLATE_AUTO_RELOAD
+    os.makedirs(TEMPLATE_CACHE_DIR, exist_ok=True)
+    env.bytecode_cache = FileSystemBytecodeCache(TEMPLATE_CACHE_DIR)
+    names = env.list_templates(extensions=["html"])
+    for name in names:
+        env.get_template(name)
+    logger.info(f"Precompiled {len(names)} templates")
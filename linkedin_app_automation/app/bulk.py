@@ -0,0 +1,167 @@
+# app/bulk.py
+import logging
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import or_
+
+from app.database import SessionLocal, ScheduledPost
+from app.scheduler import remove_jobs, add_jobs
+from app.tracing import span
+
+logger = logging.getLogger(__name__)
+
+OPERATIONS = ("delete", "shift", "spread", "pause", "resume")
+STATUSES = ("all", "pending", "paused", "posted", "failed")
+# How long a bulk result report stays available to the redirected dashboard
+REPORT_TTL_SECONDS = 300
+
+reports = {}
+reports_lock = threading.Lock()
+
+
+def parse_schedule(value):
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+def format_schedule(dt):
+    return dt.isoformat(timespec="minutes") if not dt.second else dt.isoformat()
+
+
+def select_posts(db, post_ids=None, status="pending", start=None, end=None):
+    """Query the posts a bulk operation applies to: an explicit selection, or a status/date filter."""
+    query = db.query(ScheduledPost)
+    if post_ids:
+        return query.filter(ScheduledPost.post_id.in_(post_ids)).order_by(ScheduledPost.scheduled_datetime).all()
+    is_done = or_(ScheduledPost.posted.is_(True), ScheduledPost.failed.is_(True))
+    if status == "pending":
+        query = query.filter(~is_done, ScheduledPost.paused.isnot(True))
+    elif status == "paused":
+        query = query.filter(~is_done, ScheduledPost.paused.is_(True))
+    elif status == "posted":
+        query = query.filter(ScheduledPost.posted.is_(True))
+    elif status == "failed":
+        query = query.filter(ScheduledPost.failed.is_(True))
+    if start:
+        query = query.filter(ScheduledPost.scheduled_datetime >= start)
+    if end:
+        query = query.filter(ScheduledPost.scheduled_datetime <= end)
+    return query.order_by(ScheduledPost.scheduled_datetime).all()
+
+
+def job_entry(post, run_dt):
+    return (post.post_id, post.text, post.image_url, run_dt, post.trace_id)
+
+
+def run_time(run_dt):
+    """Keep a slot, or run now if it has passed: APScheduler drops date jobs already past their misfire grace."""
+    return max(run_dt, datetime.now(run_dt.tzinfo) + timedelta(seconds=5))
+
+
+def resume_time(post):
+    return run_time(parse_schedule(post.scheduled_datetime))
+
+
+def save_report(message, results):
+    """Keep a bulk report briefly so the POST can redirect and the dashboard GET can show it."""
+    now = time.time()
+    key = uuid.uuid4().hex
+    with reports_lock:
+        for stale in [k for k, (created, _) in reports.items() if now - created > REPORT_TTL_SECONDS]:
+            del reports[stale]
+        reports[key] = (now, {"message": message, "results": results})
+    return key
+
+
+def get_report(key):
+    with reports_lock:
+        entry = reports.get(key)
+    if not entry or time.time() - entry[0] > REPORT_TTL_SECONDS:
+        return None
+    return entry[1]
+
+
+def bulk_update(operation, post_ids=None, status="pending", start=None, end=None,
+                offset_minutes=0, spread_start=None, interval_minutes=0):
+    """Apply one operation to many posts in a single DB transaction and one batched scheduler update.
+
+    Returns a list of {"post_id", "scheduled_datetime", "ok", "message"} dicts, one per matched post.
+    """
+    if operation not in OPERATIONS:
+        raise ValueError(f"Unknown bulk operation: {operation}")
+    results = {}
+    removals, additions = [], []
+    db = SessionLocal()
+    try:
+        with span("bulk." + operation):
+            posts = select_posts(db, post_ids, status, start, end)
+            spread_dt = parse_schedule(spread_start) if operation == "spread" else None
+            slot = 0
+            for post in posts:
+                finished = post.posted or post.failed
+                if operation == "delete":
+                    db.delete(post)
+                    removals.append(post.post_id)
+                    results[post.post_id] = [post.scheduled_datetime, True, "Deleted"]
+                    continue
+                if finished:
+                    results[post.post_id] = [post.scheduled_datetime, False, "Skipped: already " + ("posted" if post.posted else "failed")]
+                    continue
+                if operation in ("shift", "spread"):
+                    if operation == "shift":
+                        new_dt = parse_schedule(post.scheduled_datetime) + timedelta(minutes=offset_minutes)
+                    else:
+                        new_dt = spread_dt + timedelta(minutes=interval_minutes * slot)
+                        slot += 1
+                    post.scheduled_datetime = format_schedule(new_dt)
+                    message = "Rescheduled"
+                    if post.paused:
+                        message += " (paused)"
+                    else:
+                        job_dt = run_time(new_dt)
+                        if job_dt != new_dt:
+                            message += " (slot already passed, runs now)"
+                        additions.append(job_entry(post, job_dt))
+                    results[post.post_id] = [post.scheduled_datetime, True, message]
+                elif operation == "pause":
+                    if post.paused:
+                        results[post.post_id] = [post.scheduled_datetime, False, "Skipped: already paused"]
+                        continue
+                    post.paused = True
+                    removals.append(post.post_id)
+                    results[post.post_id] = [post.scheduled_datetime, True, "Paused"]
+                elif operation == "resume":
+                    if not post.paused:
+                        results[post.post_id] = [post.scheduled_datetime, False, "Skipped: not paused"]
+                        continue
+                    post.paused = False
+                    additions.append(job_entry(post, resume_time(post)))
+                    results[post.post_id] = [post.scheduled_datetime, True, "Resumed"]
+            for post_id in post_ids or []:
+                results.setdefault(post_id, [None, False, "Not found"])
+            db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Bulk {operation} failed, rolled back: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+    with span("bulk.scheduler_update", removals=len(removals), additions=len(additions)):
+        if removals:
+            try:
+                remove_jobs(removals)
+            except Exception as e:
+                logger.error(f"Error removing jobs in bulk {operation}: {str(e)}")
+                for post_id in removals:
+                    results[post_id][1:] = [False, f"{results[post_id][2]}, but removing the job failed: {e}"]
+        if additions:
+            for post_id, error in add_jobs(additions).items():
+                if error:
+                    results[post_id][1:] = [False, f"{results[post_id][2]}, but scheduling the job failed: {error}"]
+
+    logger.info(f"Bulk {operation} applied to {len(results)} posts")
+    return [{"post_id": post_id, "scheduled_datetime": dt, "ok": ok, "message": message}
+            for post_id, (dt, ok, message) in results.items()]
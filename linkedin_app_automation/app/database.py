@@ -20,7 +20,8 @@
 # Base.metadata.create_all(bind=engine)
 
 # app/database.py
-from sqlalchemy import create_engine, Column, Integer, String, Boolean, Text
+from sqlalchemy import create_engine, Column, Integer, String, Boolean, Text, DateTime, inspect, text
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
@@ -42,5 +43,39 @@ class ScheduledPost(Base):
     image_url = Column(String, nullable=True)
     scheduled_datetime = Column(String)
     posted = Column(Boolean, default=False)
+    trace_id = Column(String, nullable=True)
+    failed = Column(Boolean, default=False)
+    completed_at = Column(DateTime, nullable=True)
+    paused = Column(Boolean, default=False)
+
+class ArchivedPost(Base):
+    """Posted or failed rows moved out of scheduled_posts by app.retention."""
+    __tablename__ = "archived_posts"
+    id = Column(Integer, primary_key=True, index=True)
+    post_id = Column(String, unique=True, index=True)
+    text = Column(Text)
+    image_url = Column(String, nullable=True)
+    scheduled_datetime = Column(String, index=True)
+    posted = Column(Boolean, default=False)
+    trace_id = Column(String, nullable=True)
+    failed = Column(Boolean, default=False)
+    completed_at = Column(DateTime, nullable=True)
+    archived_at = Column(DateTime)
+
+def ensure_columns():
+    """Add columns introduced after a table was first created (create_all only creates tables)."""
+    for table in Base.metadata.sorted_tables:
+        existing = {c["name"] for c in inspect(engine).get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing:
+                column_type = column.type.compile(dialect=engine.dialect)
+                try:
+                    with engine.begin() as conn:
+                        conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+                except DBAPIError:
+                    # Another process (app or scheduler_worker) may have added it first
+                    if column.name not in {c["name"] for c in inspect(engine).get_columns(table.name)}:
+                        raise
 
 Base.metadata.create_all(bind=engine)
+ensure_columns()
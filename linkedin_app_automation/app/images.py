@@ -0,0 +1,130 @@
+# app/images.py
+import hashlib
+import io
+import json
+import logging
+import multiprocessing
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+with open("app/config.json") as f:
+    config = json.load(f)
+
+logger = logging.getLogger(__name__)
+
+IMAGE_MAX_SIZE = tuple(config.get("IMAGE_MAX_SIZE", [1200, 1200]))
+IMAGE_JPEG_QUALITY = config.get("IMAGE_JPEG_QUALITY", 85)
+IMAGE_MAX_SOURCE_BYTES = config.get("IMAGE_MAX_SOURCE_BYTES", 20 * 1024 * 1024)
+IMAGE_POOL_WORKERS = config.get("IMAGE_POOL_WORKERS", 2)
+IMAGE_POOL_TIMEOUT = config.get("IMAGE_POOL_TIMEOUT", 30)
+IMAGE_CACHE_SIZE = config.get("IMAGE_CACHE_SIZE", 64)
+
+# Formats LinkedIn accepts for feed images
+ACCEPTED_FORMATS = {"JPEG", "PNG", "GIF"}
+
+pool = None
+pool_lock = threading.Lock()
+cache = OrderedDict()
+cache_lock = threading.Lock()
+
+
+def normalize_image(data):
+    """Validate, downscale and re-encode image bytes. Runs in a worker process.
+
+    Returns JPEG bytes no larger than IMAGE_MAX_SIZE, or the original bytes
+    when they are already an accepted format and size (e.g. animated GIFs,
+    or files the re-encode would not shrink). Raises ValueError for
+    anything that is not a readable image.
+    """
+    if len(data) > IMAGE_MAX_SOURCE_BYTES:
+        raise ValueError(f"Image is {len(data)} bytes, over the {IMAGE_MAX_SOURCE_BYTES} byte limit")
+    try:
+        with Image.open(io.BytesIO(data)) as probe:
+            probe.verify()
+        img = Image.open(io.BytesIO(data))
+        img.load()
+    except (UnidentifiedImageError, OSError, SyntaxError) as e:
+        raise ValueError(f"Not a valid image: {e}")
+
+    source_format = img.format
+    fits = img.width <= IMAGE_MAX_SIZE[0] and img.height <= IMAGE_MAX_SIZE[1]
+    if getattr(img, "is_animated", False):
+        if source_format in ACCEPTED_FORMATS:
+            return data
+        raise ValueError(f"Animated {source_format} images are not supported")
+
+    img = ImageOps.exif_transpose(img)
+    img.thumbnail(IMAGE_MAX_SIZE, Image.LANCZOS)
+    if img.mode in ("RGBA", "LA", "P"):
+        img = img.convert("RGBA")
+        background = Image.new("RGB", img.size, (255, 255, 255))
+        background.paste(img, mask=img.split()[-1])
+        img = background
+    elif img.mode != "RGB":
+        img = img.convert("RGB")
+
+    out = io.BytesIO()
+    img.save(out, format="JPEG", quality=IMAGE_JPEG_QUALITY, optimize=True, progressive=True)
+    normalized = out.getvalue()
+    if fits and source_format in ACCEPTED_FORMATS and len(data) <= len(normalized):
+        return data
+    return normalized
+
+
+def get_pool():
+    global pool
+    with pool_lock:
+        if pool is None:
+            # spawn, not fork: the parent runs scheduler and HTTP threads that may hold locks
+            pool = ProcessPoolExecutor(max_workers=IMAGE_POOL_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+            logger.info(f"Image pool started with {IMAGE_POOL_WORKERS} workers")
+        return pool
+
+
+def shutdown_pool():
+    global pool
+    with pool_lock:
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+            pool = None
+            logger.info("Image pool shut down")
+
+
+def discard_pool(broken):
+    """Drop a pool whose worker died (e.g. on a decompression bomb) so the next call starts fresh."""
+    global pool
+    with pool_lock:
+        if pool is broken:
+            pool = None
+    broken.shutdown(wait=False, cancel_futures=True)
+    logger.error("Image pool broken, discarded")
+
+
+def prepare_image(data):
+    """Return normalized bytes for an image, reusing cached results by source hash.
+
+    Blocks until the pool finishes, so callers on the request path must run
+    in a worker thread (handle_post_action runs post_action via run_in_threadpool).
+    """
+    key = hashlib.sha256(data).hexdigest()
+    with cache_lock:
+        if key in cache:
+            cache.move_to_end(key)
+            logger.debug(f"Image cache hit for {key[:12]}")
+            return cache[key]
+    executor = get_pool()
+    try:
+        normalized = executor.submit(normalize_image, data).result(timeout=IMAGE_POOL_TIMEOUT)
+    except BrokenProcessPool:
+        discard_pool(executor)
+        raise
+    logger.info(f"Normalized image {key[:12]}: {len(data)} -> {len(normalized)} bytes")
+    with cache_lock:
+        cache[key] = normalized
+        while len(cache) > IMAGE_CACHE_SIZE:
+            cache.popitem(last=False)
+    return normalized
@@ -3,10 +3,210 @@ import logging
 import json
 import re
 import base64
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from app.tracing import span
+from app.images import prepare_image
+
+with open("app/config.json") as f:
+    config = json.load(f)
 
 logger = logging.getLogger(__name__)
 session = requests.Session()
 
+LINKEDIN_RETRIES = config.get("LINKEDIN_RETRIES", 3)
+LINKEDIN_RETRY_DELAY = config.get("LINKEDIN_RETRY_DELAY", 2)
+LINKEDIN_RETRY_MAX_DELAY = config.get("LINKEDIN_RETRY_MAX_DELAY", 30)
+LINKEDIN_BREAKER_THRESHOLD = config.get("LINKEDIN_BREAKER_THRESHOLD", 5)
+LINKEDIN_BREAKER_COOLDOWN = config.get("LINKEDIN_BREAKER_COOLDOWN", 60)
+LINKEDIN_TIMEOUT = config.get("LINKEDIN_TIMEOUT", 10)
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class RetryableError(Exception):
+    """A LinkedIn call failed in a way that may succeed if repeated."""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(Exception):
+    """A LinkedIn endpoint is short-circuited after repeated failures."""
+
+    def __init__(self, endpoint, reopen_at):
+        super().__init__(f"Circuit open for LinkedIn endpoint '{endpoint}' until {reopen_at:.0f}")
+        self.endpoint = endpoint
+        self.reopen_at = reopen_at
+
+
+class CircuitBreaker:
+    """Per-endpoint breaker: closed -> open after N failures -> half-open after cooldown."""
+
+    def __init__(self, endpoint, threshold=LINKEDIN_BREAKER_THRESHOLD, cooldown=LINKEDIN_BREAKER_COOLDOWN):
+        self.endpoint = endpoint
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.open_until = None
+        self.half_open_probe = False
+        self.lock = threading.Lock()
+
+    @property
+    def reopen_at(self):
+        if self.open_until is None:
+            return time.time()
+        if self.half_open_probe:
+            # The probe settles the breaker within one request timeout
+            return max(self.open_until, time.time() + LINKEDIN_TIMEOUT)
+        return self.open_until
+
+    def is_open(self):
+        """True while the breaker rejects calls: cooling down, or waiting on its half-open probe."""
+        with self.lock:
+            return self.open_until is not None and (self.half_open_probe or time.time() < self.open_until)
+
+    def before_call(self):
+        with self.lock:
+            if self.open_until is None:
+                return
+            if time.time() < self.reopen_at or self.half_open_probe:
+                raise CircuitOpenError(self.endpoint, self.reopen_at)
+            # Cooldown elapsed: let a single probe request through
+            self.half_open_probe = True
+
+    def record_success(self):
+        with self.lock:
+            if self.open_until is not None:
+                logger.info(f"Circuit closed for LinkedIn endpoint '{self.endpoint}'")
+            self.failures = 0
+            self.open_until = None
+            self.half_open_probe = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.half_open_probe or self.failures >= self.threshold:
+                self.open_until = time.time() + self.cooldown
+                self.half_open_probe = False
+                logger.error(f"Circuit opened for LinkedIn endpoint '{self.endpoint}' for {self.cooldown}s after {self.failures} failures")
+
+    def open_for(self, seconds):
+        """Open the breaker until a server-requested time (e.g. a long Retry-After)."""
+        with self.lock:
+            self.open_until = max(self.open_until or 0, time.time() + seconds)
+            self.half_open_probe = False
+            logger.error(f"Circuit opened for LinkedIn endpoint '{self.endpoint}' for {seconds:.0f}s as requested by Retry-After")
+
+
+breakers = {name: CircuitBreaker(name) for name in ("me", "assets", "upload", "ugcPosts")}
+
+
+def post_endpoints(image_url=None):
+    """Breaker endpoints a post_to_linkedin call (plus the user id lookup) goes through."""
+    return ("me", "assets", "upload", "ugcPosts") if image_url else ("me", "ugcPosts")
+
+
+def circuit_reopen_at(endpoints=None):
+    """Return the latest reopen time of the given (default: all) breakers that are open, or None if they are reachable."""
+    selected = [breakers[name] for name in endpoints] if endpoints else breakers.values()
+    open_breakers = [b.reopen_at for b in selected if b.is_open()]
+    return max(open_breakers) if open_breakers else None
+
+
+def parse_retry_after(value):
+    """Parse a Retry-After header (delta-seconds or HTTP date) into seconds."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt, retry_after=None):
+    """Exponential backoff with full jitter, never shorter than the server's Retry-After.
+
+    Callers must not retry in-process when ``retry_after`` exceeds LINKEDIN_RETRY_MAX_DELAY.
+    """
+    delay = random.uniform(0, min(LINKEDIN_RETRY_MAX_DELAY, LINKEDIN_RETRY_DELAY * (2 ** attempt)))
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
+
+
+def request_with_retry(method, url, endpoint=None, idempotent=True, **kwargs):
+    """Send a request, retrying transient failures and tripping the endpoint's breaker.
+
+    Retries connection errors, 429 and 5xx responses (read timeouts only when
+    ``idempotent``); other 4xx responses are fatal and raised immediately.
+    Raises ``CircuitOpenError`` while the endpoint's breaker is open, and
+    when retryable failures leave it open, so callers can tell "try again
+    later" apart from fatal or ambiguous errors. A Retry-After longer than
+    LINKEDIN_RETRY_MAX_DELAY stops retrying and opens the breaker until then.
+    """
+    breaker = breakers.get(endpoint)
+    kwargs.setdefault("timeout", LINKEDIN_TIMEOUT)
+    last_error = None
+    for attempt in range(LINKEDIN_RETRIES):
+        if breaker:
+            breaker.before_call()
+        try:
+            with span(f"linkedin.{endpoint or 'fetch'}", http_method=method, http_url=url.split("?")[0], attempt=attempt + 1) as s:
+                response = session.request(method, url, **kwargs)
+                s.set_attribute("http_status", response.status_code)
+            if response.status_code in RETRYABLE_STATUS_CODES:
+                raise RetryableError(
+                    f"{method} {url} returned {response.status_code}: {response.text[:200]}",
+                    retry_after=parse_retry_after(response.headers.get("Retry-After"))
+                )
+            response.raise_for_status()
+            if breaker:
+                breaker.record_success()
+            return response
+        except requests.exceptions.HTTPError:
+            # Fatal client error: LinkedIn is up, so this does not count against the breaker
+            if breaker:
+                breaker.record_success()
+            raise
+        except (RetryableError, requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            if isinstance(e, requests.exceptions.ReadTimeout) and not idempotent:
+                # Ambiguous: the request may have been applied, so never surface it as retryable
+                if breaker:
+                    breaker.record_failure()
+                raise
+            last_error = e
+            retry_after = getattr(e, "retry_after", None)
+            if retry_after is not None and retry_after > LINKEDIN_RETRY_MAX_DELAY:
+                if breaker:
+                    breaker.open_for(retry_after)
+                logger.error(f"{method} {url} asked to retry after {retry_after:.0f}s, giving up for now")
+                break
+            if breaker:
+                breaker.record_failure()
+            if attempt + 1 >= LINKEDIN_RETRIES or (breaker and breaker.is_open()):
+                break
+            delay = backoff_delay(attempt, retry_after)
+            logger.warning(f"Retryable error on {method} {url} (attempt {attempt + 1}/{LINKEDIN_RETRIES}): {e}; retrying in {delay:.1f}s")
+            time.sleep(delay)
+        except BaseException:
+            # Anything else (e.g. ChunkedEncodingError) must still settle a half-open probe
+            if breaker:
+                breaker.record_failure()
+            raise
+    if breaker and breaker.is_open():
+        raise CircuitOpenError(endpoint, breaker.reopen_at) from last_error
+    raise last_error
+
 def resolve_onedrive_url(share_url):
     """Resolve a OneDrive share link to a direct download URL."""
     logger.debug(f"Attempting to resolve OneDrive share link: {share_url}")
@@ -66,8 +266,7 @@ def get_linkedin_user_id(access_token):
     }
     logger.debug(f"Sending GET request to {url}, Token (masked): {access_token[:10]}...")
     try:
-        response = session.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
+        response = request_with_retry("GET", url, endpoint="me", headers=headers)
         user_data = response.json()
         user_id = user_data.get("id")
         if not user_id:
@@ -75,8 +274,10 @@ def get_linkedin_user_id(access_token):
             return None
         logger.info(f"Fetched LinkedIn user ID: {user_id}")
         return user_id
+    except CircuitOpenError:
+        raise
     except requests.exceptions.HTTPError as e:
-        logger.error(f"HTTP error fetching LinkedIn user ID: {e}, Status: {response.status_code}, Response: {response.text}")
+        logger.error(f"HTTP error fetching LinkedIn user ID: {e}, Status: {e.response.status_code}, Response: {e.response.text}")
         return None
     except Exception as e:
         logger.error(f"Error fetching LinkedIn user ID: {e}")
@@ -100,16 +301,17 @@ def register_image_upload(access_token, user_id):
     }
     logger.debug(f"Registering image upload, payload: {json.dumps(payload, indent=2)}...")
     try:
-        response = session.post(url, headers=headers, json=payload, timeout=10)
-        response.raise_for_status()
+        response = request_with_retry("POST", url, endpoint="assets", headers=headers, json=payload)
         data = response.json()
         upload_url = data["value"]["uploadMechanism"]["com.linkedin.digitalmedia.uploading.MediaUploadHttpRequest"]["uploadUrl"]
         asset_urn = data["value"]["asset"]
         media_artifact = data["value"]["mediaArtifact"]
         logger.info(f"Registered image upload, uploadUrl: {upload_url[:50]}..., asset: {asset_urn}")
         return upload_url, asset_urn, media_artifact
+    except CircuitOpenError:
+        raise
     except requests.exceptions.HTTPError as e:
-        logger.error(f"HTTP error registering image upload: {e}, Status: {response.status_code}, Response: {response.text}")
+        logger.error(f"HTTP error registering image upload: {e}, Status: {e.response.status_code}, Response: {e.response.text}")
         return None, None, None
     except Exception as e:
         logger.error(f"Error registering image upload: {e}")
@@ -119,22 +321,30 @@ def upload_image(image_url, upload_url, access_token):
     """Upload image binary to LinkedIn using the upload URL."""
     logger.debug(f"Fetching image from {image_url} for upload...")
     try:
-        response = session.get(image_url, timeout=10)
-        response.raise_for_status()
+        response = request_with_retry("GET", image_url)
+        with span("image.normalize", source_bytes=len(response.content)) as s:
+            data = prepare_image(response.content)
+            s.set_attribute("normalized_bytes", len(data))
         headers = {"Authorization": f"Bearer {access_token}"}
-        upload_response = session.post(upload_url, headers=headers, data=response.content, timeout=10)
-        upload_response.raise_for_status()
+        request_with_retry("POST", upload_url, endpoint="upload", headers=headers, data=data)
         logger.info(f"Successfully uploaded image from {image_url}")
         return True
+    except CircuitOpenError:
+        raise
     except requests.exceptions.HTTPError as e:
-        logger.error(f"HTTP error uploading image: {e}, Status: {upload_response.status_code}, Response: {upload_response.text}")
+        logger.error(f"HTTP error uploading image: {e}, Status: {e.response.status_code}, Response: {e.response.text}")
         return False
     except Exception as e:
         logger.error(f"Error uploading image: {e}")
         return False
 
 def post_to_linkedin(post_text, access_token, user_id, image_url=None):
-    """Post content with optional image to LinkedIn using v2/ugcPosts."""
+    """Post content with optional image to LinkedIn using v2/ugcPosts.
+
+    Returns True on success and False on fatal or ambiguous failures (which
+    must not be retried). Raises ``CircuitOpenError`` when LinkedIn is
+    unavailable and nothing was published, so the post can be retried later.
+    """
     if image_url:
         upload_url, asset_urn, media_artifact = register_image_upload(access_token, user_id)
         if not upload_url or not asset_urn:
@@ -175,12 +385,17 @@ def post_to_linkedin(post_text, access_token, user_id, image_url=None):
     }
     logger.debug(f"Sending POST request to {url}, payload: {json.dumps(payload, indent=2)}...")
     try:
-        response = session.post(url, headers=headers, json=payload, timeout=10)
-        response.raise_for_status()
+        # A read timeout may mean the post was created, so never resend it blindly
+        request_with_retry("POST", url, endpoint="ugcPosts", idempotent=False, headers=headers, json=payload)
         logger.info(f"Successfully posted to LinkedIn with{'out' if not image_url else''} image: {post_text[:50]}...")
         return True
+    except CircuitOpenError:
+        raise
+    except requests.exceptions.ReadTimeout as e:
+        logger.error(f"Timed out waiting for LinkedIn to confirm the post, it may have been published; not retrying: {e}")
+        return False
     except requests.exceptions.HTTPError as e:
-        logger.error(f"HTTP error posting to LinkedIn: {e}, Status: {response.status_code}, Response: {response.text}")
+        logger.error(f"HTTP error posting to LinkedIn: {e}, Status: {e.response.status_code}, Response: {e.response.text}")
         return False
     except Exception as e:
         logger.error(f"Error posting to LinkedIn: {e}")
@@ -183,19 +183,28 @@
 #     })
 
 
-from fastapi import FastAPI, Request, UploadFile, Form
-from fastapi.responses import FileResponse, HTMLResponse, RedirectResponse
+from fastapi import FastAPI, Request, UploadFile, Form, Depends, HTTPException
+from fastapi.responses import FileResponse, HTMLResponse, RedirectResponse, JSONResponse, PlainTextResponse, Response
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.concurrency import run_in_threadpool
 from contextlib import asynccontextmanager
 import uuid
 from io import BytesIO
 import pandas as pd
 from app.groq import enhance_content, generate_content
-from app.linkedin import get_linkedin_user_id, post_to_linkedin
+from app.linkedin import get_linkedin_user_id, post_to_linkedin, CircuitOpenError
 from app.database import SessionLocal, ScheduledPost
 from datetime import datetime
 from app.scheduler import initialize_scheduler, scheduler, add_job
+from app.tracing import span
+from app.images import shutdown_pool
+from app.retention import query_archive
+from app.bulk import bulk_update, save_report, get_report, STATUSES
+from app.speculation import NUM_VARIATIONS, iter_rows, speculate, take, cancel as cancel_speculation, shutdown_speculation
+from app.assets import CachedStaticFiles, STATIC_DIR, GZIP_MINIMUM_SIZE, configure_templates, make_etag, etag_matches, ui_version
+from app.profiling import PROFILING_ENABLED, admin_authorized, profile_requested, request_profile, run_profiled, list_profiles, get_profile, format_profile, dump_profile
 import logging
 from dotenv import load_dotenv
 import os
@@ -216,9 +225,30 @@ async def lifespan(app: FastAPI):
   if scheduler is not None and scheduler.running:
       scheduler.shutdown()
       logger.info("Scheduler shut down")
+  shutdown_pool()
+  shutdown_speculation()
 
 app = FastAPI(lifespan=lifespan)
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MINIMUM_SIZE)
+app.mount("/static", CachedStaticFiles(directory=STATIC_DIR), name="static")
 templates = Jinja2Templates(directory="app/templates")
+configure_templates(templates)
+
+if PROFILING_ENABLED:
+    @app.middleware("http")
+    async def profile_middleware(request: Request, call_next):
+        if not profile_requested(request):
+            return await call_next(request)
+        # Only handlers that run their work through run_profiled are captured
+        target = {"name": f"{request.method} {request.url.path}", "id": None}
+        token = request_profile.set(target)
+        try:
+            response = await call_next(request)
+        finally:
+            request_profile.reset(token)
+        if target["id"]:
+            response.headers["X-Profile-Id"] = target["id"]
+        return response
 
 UPLOAD_DIR = "uploaded"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
@@ -235,73 +265,91 @@ async def upload_page(request: Request):
   })
 
 @app.get("/template")
-async def download_template():
+async def download_template(request: Request):
     template_path = "app/input_template.xlsx"
     if not os.path.exists(template_path):
         logger.error("Template file not found")
         return {"error": "Template file not found"}
-    return FileResponse(template_path, filename="input_template.xlsx", media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+    stat = os.stat(template_path)
+    headers = {"ETag": make_etag(stat.st_mtime_ns, stat.st_size), "Cache-Control": "no-cache"}
+    if etag_matches(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(template_path, filename="input_template.xlsx", media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", headers=headers)
 
 @app.post("/upload", response_class=HTMLResponse)
 async def upload_file(request: Request, file: UploadFile):
   unique_name = f"{uuid.uuid4()}.xlsx"
   path = os.path.join(UPLOAD_DIR, unique_name)
 
-  contents = await file.read()
-  with open(path, "wb") as f:
-      f.write(contents)
+  with span("upload", filename=unique_name) as s:
+      contents = await file.read()
+      with open(path, "wb") as f:
+          f.write(contents)
 
-  df = pd.read_excel(BytesIO(contents))
-  preview_html = df.head(10).to_html(index=False, classes="excel-preview")
+      with span("excel.parse", size=len(contents)):
+          df = pd.read_excel(BytesIO(contents))
+          preview_html = df.head(10).to_html(index=False, classes="excel-preview")
+
+      speculate(unique_name, df, s.trace_id)
 
   return templates.TemplateResponse("upload_step.html", {
       "request": request,
       "filename": unique_name,
-      "preview": preview_html
+      "preview": preview_html,
+      "trace_id": s.trace_id
   })
 
 @app.post("/process", response_class=HTMLResponse)
 async def process_file(
   request: Request,
   action: str = Form(...),
-  filename: str = Form(...)
+  filename: str = Form(...),
+  trace_id: str = Form("")
 ):
+  with span("process", trace_id=trace_id or None, action=action) as s:
+      # take() waits on in-flight speculative Groq calls, so keep it off the event loop
+      return await run_in_threadpool(run_profiled, process_upload, request, action, filename, s.trace_id)
+
+def process_upload(request, action, filename, trace_id):
   file_path = os.path.join(UPLOAD_DIR, filename)
 
   if not os.path.exists(file_path):
+      cancel_speculation(filename)
       return templates.TemplateResponse("upload_step.html", {
           "request": request,
           "filename": None,
           "error": "Uploaded file not found. Please upload again."
       })
 
-  df = pd.read_excel(file_path)
+  with span("excel.parse"):
+      df = pd.read_excel(file_path)
   results = []
 
-  for _, row in df.iterrows():
-      text = str(row.get("Text", "")).strip()
-      typ = str(row.get("Type", "")).strip().lower()
-      image = row.get("image", "")
-
-      if not text or not typ:
-          continue
-
+  for text, typ, image in iter_rows(df):
       if action == "enhance" and typ == "content":
-          enhanced = enhance_content(text)
+          enhanced = take(filename, action, text) or enhance_content(text)
           results.append({"type": typ, "input": text, "output": enhanced, "image": image})
 
       elif action == "generate" and typ == "prompt":
-          for variation, i in generate_content(text, 3):
+          for variation, i in take(filename, action, text) or generate_content(text, NUM_VARIATIONS):
               results.append({"type": typ, "input": text, "output": variation, "variation": i, "image": image})
 
+  # Whatever was speculated for the other action is no longer needed
+  cancel_speculation(filename)
   os.remove(file_path)
 
   return templates.TemplateResponse("result_step.html", {
       "request": request,
       "results": results,
-      "action": action
+      "action": action,
+      "trace_id": trace_id
   })
 
+@app.post("/uploads/{filename}/cancel", status_code=204)
+async def cancel_upload(filename: str):
+  cancel_speculation(filename)
+  return Response(status_code=204)
+
 @app.post("/handle_post_action", response_class=HTMLResponse)
 async def handle_post_action(
   request: Request,
@@ -310,15 +358,35 @@ async def handle_post_action(
   input: str = Form(...),
   image: str = Form(""),
   variation: str = Form(""),
-  schedule_time: str = Form("")
+  schedule_time: str = Form(""),
+  trace_id: str = Form("")
 ):
+  with span("handle_post_action", trace_id=trace_id or None, action=action) as s:
+      # LinkedIn retries sleep between attempts, so keep them off the event loop
+      message = await run_in_threadpool(run_profiled, post_action, action, output, image, schedule_time, s.trace_id)
+
+  return templates.TemplateResponse("single_result.html", {
+      "request": request,
+      "output": output,
+      "input": input,
+      "variation": variation,
+      "image": image,
+      "message": message,
+      "trace_id": s.trace_id
+  })
+
+def post_action(action, output, image, schedule_time, trace_id):
   message = ""
   access_token = LINKEDIN_ACCESS_TOKEN
-  user_id = get_linkedin_user_id(access_token)
 
   if action == "post":
-      success = post_to_linkedin(output, access_token, user_id, image)
-      message = "✅ Posted to LinkedIn!" if success else "❌ Failed to post."
+      try:
+          user_id = get_linkedin_user_id(access_token)
+          success = post_to_linkedin(output, access_token, user_id, image)
+          message = "✅ Posted to LinkedIn!" if success else "❌ Failed to post."
+      except CircuitOpenError as e:
+          logger.warning(f"Post not sent: {e}")
+          message = "❌ LinkedIn is temporarily unavailable, nothing was posted. Please try again in a few minutes."
 
   elif action == "schedule":
       if schedule_time:
@@ -333,12 +401,14 @@ async def handle_post_action(
                   text=output,
                   image_url=image,
                   scheduled_datetime=schedule_time,
-                  posted=False
+                  posted=False,
+                  trace_id=trace_id
               ))
-              db.commit()
+              with span("db.insert_scheduled_post", post_id=post_id):
+                  db.commit()
               db.close()
 
-              add_job(post_id, output, image, run_dt)
+              add_job(post_id, output, image, run_dt, trace_id)
               message = f"🕒 Scheduled for {schedule_time}"
           except ValueError as e:
               message = f"❌ Invalid schedule time format: {str(e)}"
@@ -352,23 +422,89 @@ async def handle_post_action(
   elif action == "edit":
       message = "✏ Edited successfully! You can now post or schedule."
 
-  return templates.TemplateResponse("single_result.html", {
-      "request": request,
-      "output": output,
-      "input": input,
-      "variation": variation,
-      "image": image,
-      "message": message
-  })
+  return message
 
 @app.get("/scheduled", response_class=HTMLResponse)
-async def scheduled_dashboard(request: Request):
+async def scheduled_dashboard(request: Request, bulk: str = ""):
+  posts = load_scheduled_posts()
+  report = get_report(bulk) if bulk else None
+  if report:
+      return templates.TemplateResponse("scheduled_dashboard.html", {
+          "request": request,
+          "posts": posts,
+          "statuses": STATUSES,
+          "bulk_message": report["message"],
+          "bulk_results": report["results"]
+      }, headers={"Cache-Control": "no-store"})
+  # Fingerprint the rows so an unchanged dashboard skips rendering entirely
+  headers = {
+      "ETag": make_etag(ui_version("scheduled_dashboard.html"), [(p.post_id, p.scheduled_datetime, p.posted, p.failed, p.paused, p.text, p.image_url) for p in posts]),
+      "Cache-Control": "no-cache"
+  }
+  if etag_matches(request, headers["ETag"]):
+      return Response(status_code=304, headers=headers)
+  return templates.TemplateResponse("scheduled_dashboard.html", {
+      "request": request,
+      "posts": posts,
+      "statuses": STATUSES
+  }, headers=headers)
+
+def load_scheduled_posts():
   db = SessionLocal()
   posts = db.query(ScheduledPost).order_by(ScheduledPost.scheduled_datetime.desc()).all()
   db.close()
+  return posts
+
+@app.post("/bulk_action", response_class=RedirectResponse)
+async def bulk_action(
+  request: Request,
+  operation: str = Form(...),
+  scope: str = Form("selection"),
+  post_ids: list[str] = Form([]),
+  status: str = Form("pending"),
+  filter_start: str = Form(""),
+  filter_end: str = Form(""),
+  offset_minutes: int = Form(0),
+  spread_start: str = Form(""),
+  interval_minutes: int = Form(0)
+):
+  results = []
+  if scope == "selection" and not post_ids:
+      message = "⚠ Select at least one post."
+  elif operation == "spread" and not spread_start:
+      message = "⚠ Please select a start time to spread from."
+  else:
+      try:
+          results = bulk_update(
+              operation,
+              post_ids=post_ids if scope == "selection" else None,
+              status=status,
+              start=filter_start or None,
+              end=filter_end or None,
+              offset_minutes=offset_minutes,
+              spread_start=spread_start or None,
+              interval_minutes=interval_minutes
+          )
+          succeeded = sum(1 for r in results if r["ok"])
+          message = f"✅ {operation.capitalize()}: {succeeded} of {len(results)} posts updated"
+      except ValueError as e:
+          message = f"❌ Invalid bulk request: {str(e)}"
+      except Exception as e:
+          message = f"❌ Bulk {operation} failed, no changes were made: {str(e)}"
+
+  # Redirect so a refresh or back/forward cannot re-apply the operation
+  return RedirectResponse(url=f"/scheduled?bulk={save_report(message, results)}", status_code=303)
+
+@app.get("/scheduled/archive", response_class=HTMLResponse)
+async def archived_dashboard(request: Request, q: str = "", start: str = "", end: str = ""):
+  posts = query_archive(search=q or None, start=start or None, end=end or None)
   return templates.TemplateResponse("scheduled_dashboard.html", {
       "request": request,
-      "posts": posts
+      "posts": posts,
+      "archived": True,
+      "q": q,
+      "start": start,
+      "end": end
   })
 
 # Add this endpoint to main.py
@@ -402,4 +538,26 @@ async def delete_post(post_id: str = Form(...)):
         db.close()
     except Exception as e:
         logger.error(f"Error deleting post {post_id}: {str(e)}")
-    return RedirectResponse(url="/scheduled", status_code=303)
\ No newline at end of file
+    return RedirectResponse(url="/scheduled", status_code=303)
+
+def require_admin(request: Request):
+    if not admin_authorized(request):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+if PROFILING_ENABLED:
+    @app.get("/admin/profiles", dependencies=[Depends(require_admin)])
+    async def profiles_index():
+        return {"profiles": list_profiles()}
+
+    @app.get("/admin/profiles/{profile_id}", dependencies=[Depends(require_admin)])
+    async def profile_detail(profile_id: str, download: bool = False, sort: str = "cumulative"):
+        profile = get_profile(profile_id)
+        if not profile:
+            return JSONResponse({"error": "Profile not found"}, status_code=404)
+        if download:
+            return Response(dump_profile(profile), media_type="application/octet-stream",
+                            headers={"Content-Disposition": f'attachment; filename="{profile_id}.prof"'})
+        try:
+            return PlainTextResponse(format_profile(profile, sort_by=sort))
+        except ValueError as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
@@ -0,0 +1,146 @@
+# app/profiling.py
+import contextvars
+import cProfile
+import hmac
+import io
+import json
+import logging
+import marshal
+import os
+import pstats
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from dotenv import load_dotenv
+
+with open("app/config.json") as f:
+    config = json.load(f)
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+PROFILING_ENABLED = config.get("PROFILING_ENABLED", False)
+PROFILE_STORE_SIZE = config.get("PROFILE_STORE_SIZE", 20)
+PROFILE_JOB_SAMPLE_RATE = config.get("PROFILE_JOB_SAMPLE_RATE", 0.0)
+PROFILE_HEADER = "X-Profile"
+PROFILE_QUERY_PARAM = "profile"
+ADMIN_TOKEN_HEADER = "X-Admin-Token"
+# Shared secret for triggering profiles and reading /admin/profiles; unset means nobody may
+PROFILING_ADMIN_TOKEN = os.getenv("PROFILING_ADMIN_TOKEN")
+SORT_KEYS = {key.value for key in pstats.SortKey}
+
+profiles = deque(maxlen=PROFILE_STORE_SIZE)
+store_lock = threading.Lock()
+# Only one profiler may be attached to the interpreter at a time
+active_lock = threading.Lock()
+# Set by the request middleware; run_profiled fills in the captured profile's id
+request_profile = contextvars.ContextVar("request_profile", default=None)
+
+
+def admin_authorized(request):
+    token = request.headers.get(ADMIN_TOKEN_HEADER)
+    return bool(PROFILING_ADMIN_TOKEN and token and hmac.compare_digest(token, PROFILING_ADMIN_TOKEN))
+
+
+def profile_requested(request):
+    """Return True if an authorized request opted into profiling by header or query flag."""
+    flag = request.headers.get(PROFILE_HEADER) or request.query_params.get(PROFILE_QUERY_PARAM)
+    return flag is not None and flag.lower() in ("1", "true", "yes") and admin_authorized(request)
+
+
+def job_sampled():
+    # Profiles are only readable through /admin/profiles, which exists only when profiling is enabled
+    return PROFILING_ENABLED and PROFILE_JOB_SAMPLE_RATE > 0 and random.random() < PROFILE_JOB_SAMPLE_RATE
+
+
+@contextmanager
+def profiled(kind, name, enabled=True):
+    """Profile the enclosed block and keep the result in the bounded store.
+
+    Yields the profile id, or None when profiling is disabled or another
+    profile is already running.
+    """
+    if not enabled or not active_lock.acquire(blocking=False):
+        yield None
+        return
+    profile_id = str(uuid.uuid4())
+    profiler = cProfile.Profile()
+    started_at = datetime.now(timezone.utc)
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    profiler.enable()
+    try:
+        yield profile_id
+    finally:
+        profiler.disable()
+        active_lock.release()
+        wall_ms = (time.perf_counter() - wall_start) * 1000
+        cpu_ms = (time.process_time() - cpu_start) * 1000
+        profiler.create_stats()
+        stats = dict(profiler.stats)
+        with store_lock:
+            profiles.append({
+                "id": profile_id,
+                "kind": kind,
+                "name": name,
+                "started_at": started_at.isoformat(),
+                "wall_ms": round(wall_ms, 2),
+                "cpu_ms": round(cpu_ms, 2),
+                "stats": stats
+            })
+        logger.info(f"Captured {kind} profile {profile_id} for {name}: wall {wall_ms:.1f}ms, cpu {cpu_ms:.1f}ms")
+
+
+def run_profiled(func, *args):
+    """Run a request's blocking work, profiling it if the request opted in.
+
+    cProfile only sees the thread it is enabled in, so handlers pass their
+    LinkedIn, Groq, image and DB work through here inside run_in_threadpool.
+    Profiling around the awaited call on the event loop would miss that work
+    and count other requests served meanwhile instead.
+    """
+    target = request_profile.get()
+    with profiled("request", target["name"] if target else None, enabled=target is not None) as profile_id:
+        if target is not None:
+            target["id"] = profile_id
+        return func(*args)
+
+
+def list_profiles():
+    with store_lock:
+        return [{k: v for k, v in p.items() if k != "stats"} for p in reversed(profiles)]
+
+
+def get_profile(profile_id):
+    with store_lock:
+        return next((p for p in profiles if p["id"] == profile_id), None)
+
+
+class StatsSnapshot:
+    """Feeds pstats.Stats a copy, since loading a profile moves its stats out and leaves {} behind."""
+
+    def __init__(self, stats):
+        self.stats = dict(stats)
+
+    def create_stats(self):
+        pass
+
+
+def format_profile(profile, sort_by="cumulative", limit=50):
+    """Render a stored profile as a pstats text report. Raises ValueError for an unknown sort key."""
+    if sort_by not in SORT_KEYS:
+        raise ValueError(f"Unknown sort key '{sort_by}', expected one of: {', '.join(sorted(SORT_KEYS))}")
+    out = io.StringIO()
+    out.write(f"{profile['kind']} {profile['name']} at {profile['started_at']}: wall {profile['wall_ms']}ms, cpu {profile['cpu_ms']}ms\n\n")
+    pstats.Stats(StatsSnapshot(profile["stats"]), stream=out).sort_stats(sort_by).print_stats(limit)
+    return out.getvalue()
+
+
+def dump_profile(profile):
+    """Return the profile in the binary format read by pstats/snakeviz."""
+    return marshal.dumps(profile["stats"])
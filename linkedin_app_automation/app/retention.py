@@ -0,0 +1,108 @@
+# app/retention.py
+import json
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, or_
+
+from app.database import SessionLocal, ScheduledPost, ArchivedPost
+
+with open("app/config.json") as f:
+    config = json.load(f)
+
+logger = logging.getLogger(__name__)
+
+RETENTION_DAYS = config.get("RETENTION_DAYS", 30)
+RETENTION_BATCH_SIZE = config.get("RETENTION_BATCH_SIZE", 500)
+RETENTION_INTERVAL_HOURS = config.get("RETENTION_INTERVAL_HOURS", 6)
+
+# archived_posts assigns its own id: live ids are reused once scheduled_posts empties
+ARCHIVED_COLUMNS = ("post_id", "text", "image_url", "scheduled_datetime", "posted", "trace_id", "failed", "completed_at")
+
+
+def expired_filter(cutoff):
+    """Finished rows completed before ``cutoff``; rows from before completed_at existed fall back to their schedule."""
+    finished = or_(ScheduledPost.posted.is_(True), ScheduledPost.failed.is_(True))
+    return and_(finished, or_(
+        ScheduledPost.completed_at < cutoff,
+        and_(ScheduledPost.completed_at.is_(None), ScheduledPost.scheduled_datetime < cutoff.isoformat())
+    ))
+
+
+def archive_batch(cutoff, batch_size):
+    """Move one batch of expired rows to archived_posts in a single transaction. Returns the row count."""
+    db = SessionLocal()
+    try:
+        rows = (db.query(ScheduledPost)
+                .filter(expired_filter(cutoff))
+                .order_by(ScheduledPost.id)
+                .limit(batch_size)
+                .all())
+        if not rows:
+            return 0
+        archived_at = datetime.utcnow()
+        db.bulk_insert_mappings(ArchivedPost, [
+            dict({c: getattr(row, c) for c in ARCHIVED_COLUMNS}, archived_at=archived_at) for row in rows
+        ])
+        db.query(ScheduledPost).filter(ScheduledPost.id.in_([row.id for row in rows])).delete(synchronize_session=False)
+        db.commit()
+        return len(rows)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def prune_orphan_jobs():
+    """Remove post jobs whose row is no longer pending (posted, failed, archived or deleted)."""
+    from app.scheduler import scheduler, scheduled_job
+    if scheduler is None:
+        return 0
+    db = SessionLocal()
+    try:
+        pending = {post_id for (post_id,) in db.query(ScheduledPost.post_id)
+                   .filter(ScheduledPost.posted.isnot(True), ScheduledPost.failed.isnot(True))}
+    finally:
+        db.close()
+    removed = 0
+    for job in scheduler.get_jobs():
+        if job.func is scheduled_job and job.id not in pending:
+            scheduler.remove_job(job.id)
+            removed += 1
+    return removed
+
+
+def archive_old_posts(days=RETENTION_DAYS, batch_size=RETENTION_BATCH_SIZE):
+    """Retention pass: archive finished rows older than ``days`` in batches, then prune stale jobs."""
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    total = 0
+    while True:
+        try:
+            moved = archive_batch(cutoff, batch_size)
+        except Exception as e:
+            # Stop this pass but still prune jobs; the next pass retries the batch
+            logger.error(f"Retention batch failed after archiving {total} posts: {str(e)}")
+            break
+        total += moved
+        if moved < batch_size:
+            break
+    removed = prune_orphan_jobs()
+    logger.info(f"Retention pass archived {total} posts older than {days} days, removed {removed} orphan jobs")
+    return total
+
+
+def query_archive(search=None, start=None, end=None, limit=200):
+    """Fetch archived posts on demand, newest schedule first."""
+    db = SessionLocal()
+    try:
+        query = db.query(ArchivedPost)
+        if search:
+            query = query.filter(ArchivedPost.text.ilike(f"%{search}%"))
+        if start:
+            query = query.filter(ArchivedPost.scheduled_datetime >= start)
+        if end:
+            query = query.filter(ArchivedPost.scheduled_datetime <= end)
+        return query.order_by(ArchivedPost.scheduled_datetime.desc()).limit(limit).all()
+    finally:
+        db.close()
@@ -54,10 +54,15 @@ import logging
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
 from apscheduler.events import EVENT_JOB_EXECUTED, EVENT_JOB_ERROR
+from sqlalchemy import select
 from app.database import SessionLocal, ScheduledPost
-from app.linkedin import get_linkedin_user_id, post_to_linkedin
-from datetime import datetime
+from app.linkedin import get_linkedin_user_id, post_to_linkedin, circuit_reopen_at, post_endpoints, CircuitOpenError
+from app.profiling import profiled, job_sampled
+from app.tracing import span
+from app.retention import archive_old_posts, RETENTION_INTERVAL_HOURS
+from datetime import datetime, timedelta, timezone
 from dotenv import load_dotenv
+import threading
 import os
 
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -66,7 +71,12 @@ logger = logging.getLogger(__name__)
 load_dotenv()
 
 LINKEDIN_ACCESS_TOKEN = os.getenv("LINKEDIN_ACCESS_TOKEN")
+PARK_STAGGER_SECONDS = 5
 scheduler = None
+post_jobstore = None
+parked_lock = threading.Lock()
+parked_reopen_at = None
+parked_count = 0
 
 def job_listener(event):
     if event.exception:
@@ -74,57 +84,153 @@ def job_listener(event):
     else:
         logger.info(f"Job {event.job_id} executed successfully")
 
-def scheduled_job(post_id, text, image_url):
+def park_job(post_id, text, image_url, reopen_at, trace_id=None):
+    """Re-queue a job until the LinkedIn circuit reopens, staggered to keep firing order.
+
+    The stagger restarts for every outage window, so jobs re-parked after a
+    failed probe are not pushed back further each time.
+    """
+    global parked_count, parked_reopen_at
+    with parked_lock:
+        if parked_reopen_at != reopen_at:
+            parked_reopen_at, parked_count = reopen_at, 0
+        resume_at = datetime.fromtimestamp(reopen_at, tz=timezone.utc) + timedelta(seconds=PARK_STAGGER_SECONDS * parked_count)
+        parked_count += 1
+    add_job(post_id, text, image_url, resume_at, trace_id)
+    logger.warning(f"LinkedIn unavailable, parked post {post_id} until {resume_at}")
+
+def mark_post(post_id, success):
+    """Record the outcome of a post so retention can archive it later."""
+    db = SessionLocal()
+    try:
+        post = db.query(ScheduledPost).filter_by(post_id=post_id).first()
+        if not post:
+            return False
+        post.posted = success
+        post.failed = not success
+        post.completed_at = datetime.utcnow()
+        with span("db.mark_posted" if success else "db.mark_failed", post_id=post_id):
+            db.commit()
+        return True
+    finally:
+        db.close()
+
+def scheduled_job(post_id, text, image_url, trace_id=None):
+    with profiled("job", f"scheduled_job {post_id}", enabled=job_sampled()), \
+            span("scheduled_job", trace_id=trace_id, post_id=post_id):
+        run_scheduled_job(post_id, text, image_url, trace_id)
+
+def run_scheduled_job(post_id, text, image_url, trace_id=None):
     logger.debug(f"Scheduler triggered for post {post_id}")
     access_token = LINKEDIN_ACCESS_TOKEN
     if not access_token:
         logger.error("LINKEDIN_ACCESS_TOKEN is not set")
         return
-    user_id = get_linkedin_user_id(access_token)
-    if not user_id:
-        logger.error("Cannot get LinkedIn user ID")
+    reopen_at = circuit_reopen_at(post_endpoints(image_url))
+    if reopen_at is not None:
+        park_job(post_id, text, image_url, reopen_at, trace_id)
         return
+    db = SessionLocal()
     try:
-        success = post_to_linkedin(text, access_token, user_id, image_url)
-        db = SessionLocal()
         post = db.query(ScheduledPost).filter_by(post_id=post_id).first()
-        if post and success:
-            post.posted = True
-            db.commit()
+        if post and post.paused:
+            logger.info(f"Post {post_id} is paused, skipping")
+            return
+    finally:
+        db.close()
+    try:
+        user_id = get_linkedin_user_id(access_token)
+        if not user_id:
+            logger.error("Cannot get LinkedIn user ID")
+            mark_post(post_id, False)
+            return
+        # Only a CircuitOpenError means nothing was published; any other failure is final
+        success = post_to_linkedin(text, access_token, user_id, image_url)
+    except CircuitOpenError as e:
+        park_job(post_id, text, image_url, e.reopen_at, trace_id)
+        return
+    try:
+        if mark_post(post_id, success) and success:
             logger.info(f"Post {post_id} marked as posted")
         else:
             logger.error(f"Failed to post {post_id} to LinkedIn")
-        db.close()
     except Exception as e:
         logger.error(f"Error in scheduled_job for {post_id}: {str(e)}")
-        db.close()
 
 def initialize_scheduler():
-    global scheduler
+    global scheduler, post_jobstore
     if scheduler is None or not scheduler.running:
         jobstore_url = os.getenv("SCHEDULER_DB_URL")
         if not jobstore_url:
             logger.error("SCHEDULER_DB_URL is not set")
             raise ValueError("SCHEDULER_DB_URL is required")
-        jobstore = {'default': SQLAlchemyJobStore(url=jobstore_url)}
+        post_jobstore = SQLAlchemyJobStore(url=jobstore_url)
+        jobstore = {'default': post_jobstore}
         scheduler = BackgroundScheduler(jobstores=jobstore)
         scheduler.add_listener(job_listener, EVENT_JOB_EXECUTED | EVENT_JOB_ERROR)
         scheduler.start()
+        scheduler.add_job(
+            archive_old_posts,
+            "interval",
+            hours=RETENTION_INTERVAL_HOURS,
+            id="retention",
+            replace_existing=True
+        )
         logger.info("Scheduler initialized and started")
     else:
         logger.info("Scheduler already running")
     return scheduler
 
-def add_job(post_id, text, image_url, run_datetime):
+def add_job(post_id, text, image_url, run_datetime, trace_id=None):
     global scheduler
     initialize_scheduler()
     scheduler.add_job(
         scheduled_job,
         "date",
         run_date=run_datetime,
-        args=[post_id, text, image_url],
+        args=[post_id, text, image_url, trace_id],
         id=post_id,
         replace_existing=True
     )
     logger.info(f"Job scheduled: {post_id} at {run_datetime}")
     logger.debug(f"Current jobs: {scheduler.get_jobs()}")
+
+def remove_jobs(post_ids):
+    """Remove the jobs of many posts with a single jobstore DELETE. Returns the ids that had a job."""
+    initialize_scheduler()
+    table = post_jobstore.jobs_t
+    with post_jobstore.engine.begin() as conn:
+        existing = {row[0] for row in conn.execute(select(table.c.id).where(table.c.id.in_(list(post_ids))))}
+        if existing:
+            conn.execute(table.delete().where(table.c.id.in_(existing)))
+    scheduler.wakeup()
+    logger.info(f"Removed {len(existing)} jobs in one batch")
+    return existing
+
+def add_jobs(entries):
+    """Schedule many posts while the scheduler is paused, so it recomputes its wakeup once.
+
+    ``entries`` are (post_id, text, image_url, run_datetime, trace_id) tuples.
+    Returns {post_id: error message or None}.
+    """
+    initialize_scheduler()
+    errors = {}
+    scheduler.pause()
+    try:
+        for post_id, text, image_url, run_datetime, trace_id in entries:
+            try:
+                scheduler.add_job(
+                    scheduled_job,
+                    "date",
+                    run_date=run_datetime,
+                    args=[post_id, text, image_url, trace_id],
+                    id=post_id,
+                    replace_existing=True
+                )
+                errors[post_id] = None
+            except Exception as e:
+                errors[post_id] = str(e)
+    finally:
+        scheduler.resume()
+    logger.info(f"Scheduled {len(entries)} jobs in one batch")
+    return errors
@@ -0,0 +1,144 @@
+# app/speculation.py
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from app.groq import enhance_content, generate_content
+from app.tracing import span
+
+with open("app/config.json") as f:
+    config = json.load(f)
+
+logger = logging.getLogger(__name__)
+
+SPECULATION_ENABLED = config.get("SPECULATION_ENABLED", False)
+SPECULATION_WORKERS = config.get("SPECULATION_WORKERS", 1)
+SPECULATION_TTL = config.get("SPECULATION_TTL", 900)
+SPECULATION_WAIT_TIMEOUT = config.get("SPECULATION_WAIT_TIMEOUT", 60)
+# Share of MAX_DAILY_REQUESTS that speculative Groq calls may consume
+SPECULATION_QUOTA_SHARE = config.get("SPECULATION_QUOTA_SHARE", 0.2)
+NUM_VARIATIONS = config.get("NUM_VARIATIONS", 3)
+
+ACTIONS = {"content": "enhance", "prompt": "generate"}
+
+executor = ThreadPoolExecutor(max_workers=SPECULATION_WORKERS, thread_name_prefix="speculation")
+speculations = {}
+lock = threading.Lock()
+quota = {"day": None, "used": 0}
+
+
+def iter_rows(df):
+    """Yield (text, type, image) for usable rows of an uploaded sheet."""
+    for _, row in df.iterrows():
+        text = str(row.get("Text", "")).strip()
+        typ = str(row.get("Type", "")).strip().lower()
+        image = row.get("image", "")
+        if text and typ:
+            yield text, typ, image
+
+
+def request_cost(action):
+    return 1 if action == "enhance" else NUM_VARIATIONS
+
+
+def reserve_quota(cost):
+    budget = int(config.get("MAX_DAILY_REQUESTS", 1000) * SPECULATION_QUOTA_SHARE)
+    with lock:
+        today = date.today()
+        if quota["day"] != today:
+            quota["day"], quota["used"] = today, 0
+        if quota["used"] + cost > budget:
+            return False
+        quota["used"] += cost
+        return True
+
+
+def release_quota(cost):
+    with lock:
+        quota["used"] = max(0, quota["used"] - cost)
+
+
+class Speculation:
+    def __init__(self, upload_id):
+        self.upload_id = upload_id
+        self.futures = {}
+        self.cancelled = False
+        self.timer = None
+
+
+def run_task(spec, action, text, trace_id):
+    if spec.cancelled:
+        return None
+    with span(f"speculate.{action}", trace_id=trace_id, upload_id=spec.upload_id):
+        if action == "enhance":
+            return enhance_content(text)
+        return generate_content(text, NUM_VARIATIONS)
+
+
+def speculate(upload_id, df, trace_id=None):
+    """Start background Groq work for every row of a freshly uploaded sheet."""
+    if not SPECULATION_ENABLED:
+        return
+    spec = Speculation(upload_id)
+    for text, typ, _ in iter_rows(df):
+        action = ACTIONS.get(typ)
+        if action is None or (action, text) in spec.futures:
+            continue
+        cost = request_cost(action)
+        if not reserve_quota(cost):
+            logger.info(f"Speculation quota exhausted, leaving remaining rows of {upload_id} for /process")
+            break
+        spec.futures[(action, text)] = (executor.submit(run_task, spec, action, text, trace_id), cost)
+    spec.timer = threading.Timer(SPECULATION_TTL, cancel, args=[upload_id])
+    spec.timer.daemon = True
+    spec.timer.start()
+    with lock:
+        speculations[upload_id] = spec
+    logger.info(f"Speculating {len(spec.futures)} tasks for upload {upload_id}")
+
+
+def take(upload_id, action, text):
+    """Return the precomputed output for a row, or None if /process should compute it itself.
+
+    Tasks that have not started yet are cancelled rather than awaited, so the
+    request runs them at normal priority instead of queueing behind speculation.
+    Blocks on running tasks, so callers must run in a worker thread.
+    """
+    with lock:
+        spec = speculations.get(upload_id)
+        entry = spec.futures.pop((action, text), None) if spec else None
+    if entry is None:
+        return None
+    future, cost = entry
+    if future.cancel():
+        release_quota(cost)
+        return None
+    try:
+        return future.result(timeout=SPECULATION_WAIT_TIMEOUT)
+    except Exception as e:
+        logger.error(f"Speculative {action} for upload {upload_id} failed: {e}")
+        return None
+
+
+def cancel(upload_id):
+    """Drop an upload's speculation, cancelling whatever has not started."""
+    with lock:
+        spec = speculations.pop(upload_id, None)
+        entries = list(spec.futures.values()) if spec else []
+    if not spec:
+        return
+    spec.cancelled = True
+    if spec.timer:
+        spec.timer.cancel()
+    cancelled = 0
+    for future, cost in entries:
+        if future.cancel():
+            release_quota(cost)
+            cancelled += 1
+    logger.info(f"Cancelled speculation for upload {upload_id} ({cancelled} tasks not started)")
+
+
+def shutdown_speculation():
+    executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,18 @@
+// Select/deselect every post for a bulk action
+const selectAll = document.getElementById('select-all');
+if (selectAll) {
+  selectAll.addEventListener('change', () => {
+    document.querySelectorAll('.select-post').forEach(box => { box.checked = selectAll.checked; });
+  });
+}
+
+// Confirm destructive bulk actions
+const bulkForm = document.getElementById('bulk-form');
+if (bulkForm) {
+  bulkForm.addEventListener('submit', e => {
+    const scope = e.submitter ? e.submitter.value : 'selection';
+    if (bulkForm.elements.operation.value === 'delete' && !confirm(`Delete all ${scope === 'filter' ? 'filtered' : 'selected'} posts?`)) {
+      e.preventDefault();
+    }
+  });
+}
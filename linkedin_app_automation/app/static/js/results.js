@@ -0,0 +1,16 @@
+// Enable Edit button only if textarea is changed
+document.addEventListener("DOMContentLoaded", () => {
+  document.querySelectorAll(".result-card").forEach((card) => {
+    const textarea = card.querySelector("textarea");
+    const editButton = card.querySelector(".edit-btn");
+    const originalValue = textarea.value;
+
+    textarea.addEventListener("input", () => {
+      if (textarea.value !== originalValue) {
+        editButton.disabled = false;
+      } else {
+        editButton.disabled = true;
+      }
+    });
+  });
+});
@@ -0,0 +1,12 @@
+function toggleTheme() {
+  const body = document.body;
+  const current = body.getAttribute('data-theme');
+  const next = current === 'dark' ? 'light' : 'dark';
+  body.setAttribute('data-theme', next);
+  localStorage.setItem('theme', next);
+}
+
+(function () {
+  const saved = localStorage.getItem('theme');
+  if (saved) document.body.setAttribute('data-theme', saved);
+})();
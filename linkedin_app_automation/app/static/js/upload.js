@@ -0,0 +1,65 @@
+const dropzone = document.querySelector('.dropzone');
+const fileInput = document.getElementById('fileInput');
+const fileNameDisplay = document.getElementById('fileNameDisplay');
+const cancelButton = document.getElementById('cancelButton');
+
+fileInput.addEventListener('change', () => {
+  if (fileInput.files.length > 0) {
+    fileNameDisplay.textContent = `Selected: ${fileInput.files[0].name}`;
+    cancelButton.style.display = 'inline';
+  } else {
+    fileNameDisplay.textContent = '';
+    cancelButton.style.display = 'none';
+  }
+});
+
+
+cancelButton.addEventListener('click', () => {
+  fileInput.value = ''; // Clear the file input
+  fileNameDisplay.textContent = '';
+  cancelButton.style.display = 'none';
+});
+
+// Drag and drop
+dropzone.addEventListener('dragover', e => {
+  e.preventDefault();
+  dropzone.classList.add('dragover');
+});
+
+dropzone.addEventListener('dragleave', () => {
+  dropzone.classList.remove('dragover');
+});
+
+dropzone.addEventListener('drop', e => {
+  e.preventDefault();
+  dropzone.classList.remove('dragover');
+  if (e.dataTransfer.files.length) {
+    fileInput.files = e.dataTransfer.files;
+    fileNameDisplay.textContent = "📄 Selected file: " + fileInput.files[0].name;
+  }
+});
+
+// Show selected file name
+fileInput.addEventListener('change', function () {
+  const fileName = this.files.length > 0 ? this.files[0].name : '';
+  fileNameDisplay.textContent = fileName ? `📄 Selected file: ${fileName}` : '';
+});
+
+// Release speculative work for this upload unless the user moves on to /process
+const processForm = document.querySelector('form[action="/process"]');
+if (processForm) {
+  let processing = false;
+  processForm.addEventListener('submit', () => { processing = true; });
+  window.addEventListener('pagehide', () => {
+    if (!processing) navigator.sendBeacon(`/uploads/${processForm.elements.filename.value}/cancel`);
+  });
+}
+
+function downloadTemplate() {
+  const link = document.createElement('a');
+  link.href = '/template';  // 🔁 Replace with actual route to your file if different
+  link.download = '';
+  document.body.appendChild(link);
+  link.click();
+  document.body.removeChild(link);
+}
@@ -0,0 +1,207 @@
+# app/tracing.py
+import contextvars
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+import requests
+from dotenv import load_dotenv
+
+with open("app/config.json") as f:
+    config = json.load(f)
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "linkedin_app_automation"
+TRACING_EXPORTER = config.get("TRACING_EXPORTER", "none")
+TRACE_FILE = config.get("TRACE_FILE", "traces.jsonl")
+# The file rotates to <TRACE_FILE>.1 at this size, so at most twice this is kept on disk
+TRACE_FILE_MAX_BYTES = config.get("TRACE_FILE_MAX_BYTES", 10 * 1024 * 1024)
+TRACE_FLUSH_INTERVAL = config.get("TRACE_FLUSH_INTERVAL", 5)
+OTLP_ENDPOINT = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "http://localhost:4318")
+
+current_span = contextvars.ContextVar("current_span", default=None)
+# OTLP trace ids are 16 bytes of hex; collectors reject a whole batch over one bad id
+TRACE_ID_RE = re.compile(r"[0-9a-f]{32}")
+
+
+def new_trace_id():
+    return uuid.uuid4().hex
+
+
+def valid_trace_id(value):
+    """Return ``value`` if it is a usable trace id (e.g. from a form field), else None."""
+    if value and TRACE_ID_RE.fullmatch(value) and value != "0" * 32:
+        return value
+    return None
+
+
+def current_trace_id():
+    span = current_span.get()
+    return span.trace_id if span else None
+
+
+class Span:
+    def __init__(self, name, trace_id, parent_id=None, attributes=None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.attributes = dict(attributes or {})
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.error = None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    @property
+    def duration_ms(self):
+        return (self.end_ns - self.start_ns) / 1e6 if self.end_ns else None
+
+    def to_dict(self):
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": self.duration_ms,
+            "attributes": self.attributes,
+            "error": self.error
+        }
+
+    def to_otlp(self):
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [{"key": k, "value": {"stringValue": str(v)}} for k, v in self.attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1}
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+class FileExporter:
+    """Buffer finished spans and append them as JSON lines to a size-capped local file.
+
+    Writes happen on a background thread so spans ending on the event loop
+    never wait on disk I/O.
+    """
+
+    def __init__(self, path, flush_interval, max_bytes):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.pending = []
+        self.lock = threading.Lock()
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def export(self, span):
+        with self.lock:
+            self.pending.append(span)
+
+    def run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            batch, self.pending = self.pending, []
+        if not batch:
+            return
+        data = "".join(json.dumps(s.to_dict(), default=str) + "\n" for s in batch)
+        try:
+            if os.path.exists(self.path) and os.path.getsize(self.path) + len(data) > self.max_bytes:
+                os.replace(self.path, self.path + ".1")
+            with open(self.path, "a") as f:
+                f.write(data)
+        except OSError as e:
+            logger.error(f"Error writing {len(batch)} spans to {self.path}: {e}")
+
+
+class OTLPExporter:
+    """Batch finished spans and POST them to an OTLP/HTTP JSON collector."""
+
+    def __init__(self, endpoint, flush_interval):
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.flush_interval = flush_interval
+        self.pending = []
+        self.lock = threading.Lock()
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def export(self, span):
+        with self.lock:
+            self.pending.append(span)
+
+    def run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            batch, self.pending = self.pending, []
+        if not batch:
+            return
+        payload = {
+            "resourceSpans": [{
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+                "scopeSpans": [{"scope": {"name": __name__}, "spans": [s.to_otlp() for s in batch]}]
+            }]
+        }
+        try:
+            requests.post(self.url, json=payload, timeout=5).raise_for_status()
+        except Exception as e:
+            logger.error(f"Error exporting {len(batch)} spans to {self.url}: {e}")
+
+
+if TRACING_EXPORTER == "file":
+    exporter = FileExporter(TRACE_FILE, TRACE_FLUSH_INTERVAL, TRACE_FILE_MAX_BYTES)
+elif TRACING_EXPORTER == "otlp":
+    exporter = OTLPExporter(OTLP_ENDPOINT, TRACE_FLUSH_INTERVAL)
+else:
+    exporter = None
+
+
+@contextmanager
+def span(name, trace_id=None, **attributes):
+    """Record a span, continuing ``trace_id`` or the current span's trace.
+
+    Starts a new trace when neither is available or ``trace_id`` is
+    malformed. Yields the Span so callers can attach attributes such as
+    response status.
+    """
+    trace_id = valid_trace_id(trace_id)
+    parent = current_span.get()
+    if not trace_id:
+        trace_id = parent.trace_id if parent else new_trace_id()
+    parent_id = parent.span_id if parent and parent.trace_id == trace_id else None
+    s = Span(name, trace_id, parent_id, attributes)
+    token = current_span.set(s)
+    try:
+        yield s
+    except Exception as e:
+        s.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        s.end_ns = time.time_ns()
+        current_span.reset(token)
+        if exporter:
+            try:
+                exporter.export(s)
+            except Exception as e:
+                logger.error(f"Error exporting span {s.name}: {e}")